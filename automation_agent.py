@@ -1,66 +1,426 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 import json
+import orjson
 import time
 import re
 import os
 import subprocess
+import zipfile
+import io
+import collections
+import platform
+import functools
+import heapq
+import itertools
 from datetime import datetime
 from pathlib import Path
 import requests
-from typing import List, Dict, Optional, Tuple, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Optional, Tuple, Any, Callable, Union
 import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sqlite3
 from dotenv import load_dotenv
 import anthropic
+import httpx
+
+try:
+    # SIMD-accelerated base64, used when installed
+    import pybase64
+except ImportError:
+    pybase64 = None
 
 # Load environment variables
 load_dotenv()
 
+# Host platform, queried once
+_IS_WINDOWS = platform.system() == "Windows"
+_IS_MAC = platform.system() == "Darwin"
+
+# Patterns for pulling JSON out of Claude's responses
+_JSON_FENCED = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_JSON_BARE_FENCE = re.compile(r'```\s*(.*?)\s*```', re.DOTALL)
+_JSON_RAW = re.compile(r'\{.*\}', re.DOTALL)
+
+# C/C++ source and header suffixes fetched for analysis. Passed whole to
+# str.endswith: os.path.splitext + frozenset lookup measured ~5x slower
+# (splitext is pure Python)
+_CPP_SUFFIXES: Tuple[str, ...] = ('.cpp', '.h', '.hpp', '.cc', '.c')
+
+# Repository path of a C/C++ file outside hidden directories, matched in one
+# pass over each path of a recursive tree listing
+_CPP_PATH_RE = re.compile(r'(?:[^./][^/]*/)*[^/]*\.(?:cpp|hpp|cc|[ch])')
+
+# Build output and vendored dependencies, never sent for analysis
+_DEFAULT_EXCLUDE_DIRS = ['build', 'third_party', 'external', 'vendor', '.git', 'node_modules']
+
+# C/C++ file and line in a compiler diagnostic: GCC/Clang "path/file.cpp:12:5:"
+# or MSVC "C:\path\file.cpp(12,5):"
+_ERROR_FILE_RE = re.compile(r'([\w./\\-]+\.(?:cpp|hpp|cc|[ch]))(?::(\d+)|\((\d+)(?:,\d+)?\))')
+
+# Lines worth showing Claude from a build log
+_LOG_ERROR_RE = re.compile(r'error[:\s]|undefined reference|CMake Error', re.IGNORECASE)
+
+# Per-line ISO timestamp GitHub Actions prefixes to every log line
+_LOG_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z ', re.MULTILINE)
+
+# Runner checkout directory: /home/runner/work/<repo>/<repo>/ on Linux,
+# /Users/runner/work/... on macOS, D:\a\<repo>\<repo>\ on Windows
+_RUNNER_WORKSPACE_RE = re.compile(
+    r'(?:/home/runner/work|/Users/runner/work|[A-Za-z]:[\\/]a)[\\/][^\\/\s]+[\\/][^\\/\s]+[\\/]'
+)
+
+# Top-level directory of an #include path, e.g. "boost" in <boost/asio.hpp>
+_INCLUDE_DIR_RE = re.compile(r'#\s*include\s*[<"]([\w.+-]+)/')
+
+# Include directory -> vcpkg port, used when Claude is unavailable
+_HEADER_DEPENDENCIES = {
+    'boost': 'boost',
+    'openssl': 'openssl',
+    'curl': 'curl',
+    'nlohmann': 'nlohmann-json',
+}
+
+# Written on first start so the user knows which keys to fill in
+_ENV_TEMPLATE = """# API Keys for C++ Build Automation
+ANTHROPIC_API_KEY=your_claude_api_key_here
+GITHUB_TOKEN=your_github_token_here
+# GITHUB_TOKENS=token2,token3  (optional, rotated to raise rate limits)
+"""
+
+# Build file templates for the fallback generator
+_VCPKG_VERSION = "1.0.0"
+
+_CMAKE_TEMPLATE = """cmake_minimum_required(VERSION 3.16)
+project({project})
+
+set(CMAKE_CXX_STANDARD {std})
+set(CMAKE_CXX_STANDARD_REQUIRED ON)
+
+add_executable({project} {sources})
+"""
+
+_WORKFLOW_TEMPLATE = """name: Build
+on: [push, pull_request]
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+    - uses: actions/checkout@v3
+    - name: Build
+      run: |
+        mkdir build && cd build
+        cmake .. && make
+"""
+
+def _b64decode(data: Union[str, bytes]) -> bytes:
+    """Decode base64, ignoring the line breaks GitHub inserts"""
+    if pybase64 is not None:
+        return pybase64.b64decode(data, validate=False)
+    return base64.b64decode(data)
+
+def _b64encode(data: bytes) -> str:
+    """Encode bytes as a single-line base64 string"""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+def _focus_log(text: str, max_bytes: int, context: int = 20) -> str:
+    """Keep the error lines of a build log with `context` lines around
+    each, capped to the last max_bytes"""
+    before = collections.deque(maxlen=context)
+    kept = []
+    after = 0
+    skipped = False
+    
+    for line in text.splitlines():
+        if _LOG_ERROR_RE.search(line):
+            if skipped and kept:
+                kept.append("...")
+            kept.extend(before)
+            before.clear()
+            kept.append(line)
+            after = context
+            skipped = False
+        elif after:
+            kept.append(line)
+            after -= 1
+        else:
+            if len(before) == context:
+                skipped = True
+            before.append(line)
+    
+    # Nothing recognizable - send the raw tail rather than nothing
+    return _tail_bytes("\n".join(kept) if kept else text, max_bytes)
+
+def _normalize_log(text: str) -> str:
+    """Strip what differs between otherwise identical failures - line
+    timestamps, the runner's checkout path and path separators - so logs
+    can be compared across runs and operating systems"""
+    text = _LOG_TIMESTAMP_RE.sub('', text)
+    return _RUNNER_WORKSPACE_RE.sub('', text).replace('\\', '/')
+
+def _tail_bytes(text: str, max_bytes: int) -> str:
+    """Last max_bytes of text (UTF-8)"""
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[-max_bytes:].decode('utf-8', errors='ignore')
+
+def _write_default_env() -> bool:
+    """Create .env from the template; False if it already exists"""
+    try:
+        # Exclusive create checks and opens in one step
+        with open('.env', 'x') as f:
+            f.write(_ENV_TEMPLATE)
+    except FileExistsError:
+        return False
+    return True
+
+def _error_locations(error_log: str, source_paths: List[str]) -> Dict[str, List[int]]:
+    """Map repository files named in compiler diagnostics to the reported
+    line numbers, in order of first mention"""
+    # Longest paths first, so the most specific suffix match wins
+    by_name = collections.defaultdict(list)
+    for path in sorted(source_paths, key=len, reverse=True):
+        by_name[path.rsplit('/', 1)[-1]].append(path)
+    
+    locations = {}
+    for reported, gcc_line, msvc_line in _ERROR_FILE_RE.findall(error_log):
+        reported = reported.replace('\\', '/')
+        # Runners report absolute checkout paths - match on a path suffix
+        for path in by_name.get(reported.rsplit('/', 1)[-1], ()):
+            if reported == path or reported.endswith('/' + path):
+                locations.setdefault(path, []).append(int(gcc_line or msvc_line))
+                break
+    return locations
+
+def _source_excerpt(content: str, line_numbers: List[int], context: int = 20) -> str:
+    """The lines within `context` of each reported line, with "..." gaps"""
+    lines = content.splitlines()
+    keep = set()
+    for number in line_numbers:
+        keep.update(range(max(number - 1 - context, 0), min(number + context, len(lines))))
+    
+    excerpt = []
+    previous = -1
+    for index in sorted(keep):
+        if index != previous + 1:
+            excerpt.append("...")
+        excerpt.append(lines[index])
+        previous = index
+    if previous != len(lines) - 1:
+        excerpt.append("...")
+    return "\n".join(excerpt)
+
+@functools.lru_cache(maxsize=128)
+def _extract_json_text(text: str) -> str:
+    """Extract JSON from Claude's response (memoized - retries often repeat text)"""
+    # Pattern 1: ```json ... ```
+    match = _JSON_FENCED.search(text)
+    if match:
+        return match.group(1)
+    
+    # Pattern 2: ``` ... ```  
+    match = _JSON_BARE_FENCE.search(text)
+    if match:
+        return match.group(1)
+    
+    # Pattern 3: Raw JSON
+    match = _JSON_RAW.search(text)
+    if match:
+        return match.group(0)
+    
+    return text
+
+class ResponseCache:
+    """Persistent SQLite-backed cache for parsed Claude responses"""
+    
+    def __init__(self, directory: str = ".claude_cache"):
+        Path(directory).mkdir(exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(Path(directory) / "cache.db"), check_same_thread=False)
+        # WAL appends instead of rewriting pages through a rollback journal,
+        # and NORMAL skips the fsync per commit - losing the last few entries
+        # on power failure is harmless for a cache
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Content-address a request by hashing its parts"""
+        return hashlib.sha256("".join(parts).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires < time.time():
+            return None
+        return orjson.loads(value)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value, optionally expiring after ttl seconds"""
+        expires = time.time() + ttl if ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), expires)
+            )
+
+class AutomationStopped(Exception):
+    """Raised out of a long wait when the user stops the automation"""
+
+def _interruptible_sleep(seconds: float, stop_event: Optional[threading.Event]):
+    """Sleep, cut short by AutomationStopped if stop_event gets set"""
+    if stop_event is None:
+        time.sleep(seconds)
+    elif stop_event.wait(seconds):
+        raise AutomationStopped()
+
+class TokenBucket:
+    """Token-bucket throttle for Claude input tokens per minute"""
+    
+    def __init__(self, tokens_per_minute: float, stop_event: Optional[threading.Event] = None):
+        self.stop_event = stop_event
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self, amount: float):
+        """Block until amount tokens are available, then take them"""
+        # A single oversized request can never exceed a full bucket
+        amount = min(amount, self.capacity)
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                _interruptible_sleep((amount - self.tokens) / self.rate, self.stop_event)
+
+class ResponseTruncated(Exception):
+    """Claude stopped at max_tokens before finishing its response"""
+
 class ClaudeCoordinator:
     """Claude AI coordinator for the build automation process"""
     
-    def __init__(self, api_key: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    # Output token limit per task, sent as is: unused max_tokens costs
+    # nothing, while a truncated JSON answer wastes the whole call
+    MAX_OUTPUT_TOKENS = {"analyze": 2000, "generate": 4000, "fix": 4000}
+    
+    # Keys a streamed answer must have before the rest of the stream is
+    # dropped - a quoted build file is fenced too, but is not the answer
+    REQUIRED_KEYS = {
+        "analyze": ("dependencies", "source_files"),
+        "generate": ("vcpkg.json", "CMakeLists.txt", "workflow.yml"),
+        "fix": ("diagnosis",)
+    }
+    
+    # How long a fix stays reusable for an identical error log and file set
+    FIX_CACHE_TTL = 24 * 3600
+    
+    # Model per task: extraction-style analysis runs on the cheaper model
+    DEFAULT_MODELS = {
+        "analyze": "claude-haiku-4-5-20251001",
+        "generate": "claude-sonnet-4-20250514",
+        "fix": "claude-sonnet-4-20250514"
+    }
+    
+    def __init__(self, api_key: str, log_callback: Optional[Callable[[str], None]] = None,
+                 cache_ttl: Optional[float] = None, use_cache: bool = True,
+                 stream_callback: Optional[Callable[[str], None]] = None,
+                 input_tokens_per_minute: int = 40000,
+                 models: Optional[Dict[str, str]] = None,
+                 stop_event: Optional[threading.Event] = None,
+                 max_log_bytes: int = 32768):
+        # Shared HTTP/2 pool; transient 429/529s are retried by the SDK
+        # instead of dropping straight to the fallback generators
+        self.client = anthropic.Anthropic(
+            api_key=api_key,
+            max_retries=2,
+            http_client=anthropic.DefaultHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
         self.conversation_history = []
+        self.log = log_callback or print
+        # Receives response text incrementally as Claude generates it
+        self.stream_callback = stream_callback
+        self._cache = ResponseCache(".claude_cache")
+        self.cache_ttl = cache_ttl
+        # When False, cached responses are ignored but still refreshed
+        self.use_cache = use_cache
+        # Stay under the organization's input-tokens-per-minute limit
+        self._throttle = TokenBucket(input_tokens_per_minute, stop_event)
+        # Set when the user stops; long waits and streams give up on it
+        self.stop_event = stop_event
+        # Error logs are fetched to this budget and sent by their tail
+        self.max_log_bytes = max_log_bytes
+        self.models = {**self.DEFAULT_MODELS, **(models or {})}
         
     def analyze_code_requirements(self, files: Dict[str, str]) -> Dict:
         """Use Claude to analyze C++ code and determine requirements"""
         
         # Prepare code context for Claude
-        code_context = "I have the following C++ project files:\n\n"
+        parts = ["I have the following C++ project files:\n\n"]
         for filename, content in files.items():
             # Limit content size for API limits
-            truncated = content[:2000] if len(content) > 2000 else content
-            code_context += f"=== {filename} ===\n{truncated}\n...\n\n"
+            parts.append(f"=== {filename} ===\n{content[:2000]}\n...\n\n")
+        code_context = "".join(parts)
         
-        prompt = f"""{code_context}
-
-Please analyze these C++ files and provide:
+        instructions = """Please analyze these C++ files and provide:
 1. All required dependencies (libraries) for vcpkg.json
 2. The minimum C++ standard required
 3. Any special build requirements or flags
 4. List of all source files that should be compiled
 
 Respond in JSON format:
-{{
+{
     "dependencies": ["lib1", "lib2"],
     "cpp_standard": "17",
     "source_files": ["main.cpp", "other.cpp"],
     "special_requirements": "any special notes",
     "cmake_flags": []
-}}"""
+}"""
+
+        content = [
+            {"type": "text", "text": code_context},
+            {"type": "text", "text": instructions}
+        ]
 
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=2000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            # Extract JSON from response
-            json_str = self._extract_json(response.content[0].text)
-            return json.loads(json_str)
+            return self._cached_call({
+                "model": self.models["analyze"],
+                "max_tokens": self.MAX_OUTPUT_TOKENS["analyze"],
+                "messages": [{"role": "user", "content": content}]
+            }, lambda text: orjson.loads(self._extract_json(text)), task="analyze")
+        except AutomationStopped:
+            raise
         except Exception as e:
             print(f"Claude analysis error: {e}")
             # Fallback to basic analysis
@@ -72,9 +432,9 @@ Respond in JSON format:
         prompt = f"""Generate build files for a C++ project with these requirements:
         
 Project Name: {project_name}
-Dependencies: {json.dumps(analysis.get('dependencies', []))}
+Dependencies: {orjson.dumps(analysis.get('dependencies', [])).decode()}
 C++ Standard: {analysis.get('cpp_standard', '17')}
-Source Files: {json.dumps(analysis.get('source_files', []))}
+Source Files: {orjson.dumps(analysis.get('source_files', [])).decode()}
 Target OS: {', '.join(target_os)}
 Special Requirements: {analysis.get('special_requirements', 'None')}
 
@@ -93,31 +453,166 @@ Respond with JSON containing the content of each file:
 }}"""
 
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            json_str = self._extract_json(response.content[0].text)
-            return json.loads(json_str)
+            return self._cached_call({
+                "model": self.models["generate"],
+                "max_tokens": self.MAX_OUTPUT_TOKENS["generate"],
+                "messages": [{"role": "user", "content": prompt}]
+            }, lambda text: orjson.loads(self._extract_json(text)), task="generate")
+        except AutomationStopped:
+            raise
         except Exception as e:
             print(f"Claude generation error: {e}")
             return self._fallback_generation(project_name, analysis, target_os)
     
     def fix_build_errors(self, error_log: str, current_files: Dict[str, str], 
-                        attempt: int, source_files: Dict[str, str] = None) -> Dict:
+                        attempt: int, source_files: Dict[str, str] = None,
+                        stream: bool = True) -> Dict:
         """Use Claude to analyze build errors and suggest fixes"""
+        # The prompt mentions the attempt number, so a repeated failure with
+        # unchanged files would miss the prompt cache - key on the inputs instead
+        fix_key = self._fix_cache_key(error_log, current_files, attempt, source_files)
+        if self.use_cache:
+            cached = self._cache.get(fix_key)
+            if cached is not None:
+                self.log("INFO: Same errors with unchanged files - reusing previous fix.")
+                return cached
+        
+        params = self._build_fix_request(error_log, current_files, attempt, source_files)
+        
+        try:
+            fixes = self._cached_call(params, lambda text: self._parse_fix_response(
+                text, current_files, attempt, source_files), stream=stream, task="fix")
+            self._cache.set(fix_key, fixes, self.FIX_CACHE_TTL)
+            return fixes
+        except AutomationStopped:
+            raise
+        except Exception as e:
+            print(f"Claude error fix failed: {e}")
+            return self._failed_fix(e)
+    
+    def fix_build_errors_parallel(self, error_logs: Dict[str, str], current_files: Dict[str, str],
+                                  attempt: int, source_files: Dict[str, str] = None) -> Dict[str, Dict]:
+        """Analyze several build error logs (e.g. one per target OS) concurrently,
+        sharing one Claude call between identical logs. Returns fixes keyed like error_logs."""
+        groups = self._group_identical_logs(error_logs, current_files)
+        if len(groups) < len(error_logs):
+            self.log(f"{len(error_logs)} failed jobs share {len(groups)} distinct error logs")
+        
+        # Interleaved token streams from parallel calls would be unreadable
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                executor.submit(self.fix_build_errors, error_logs[names[0]], current_files,
+                                attempt, source_files, len(groups) == 1): names
+                for names in groups.values()
+            }
+            return {name: future.result() for future, names in futures.items() for name in names}
+    
+    def fix_build_errors_batch(self, error_logs: Dict[str, str], current_files: Dict[str, str],
+                               attempt: int, source_files: Dict[str, str] = None,
+                               max_wait: int = 900) -> Dict[str, Dict]:
+        """Analyze several build error logs (e.g. one per target OS) in a single
+        Message Batches request. Returns the fixes keyed like error_logs."""
+        groups = self._group_identical_logs(error_logs, current_files)
+        
+        # custom_id only allows [a-zA-Z0-9_-], so map log groups to indices
+        keys = list(groups)
+        requests_ = [
+            {
+                "custom_id": f"fix-{i}",
+                "params": self._build_fix_request(error_logs[groups[key][0]], current_files,
+                                                  attempt, source_files)
+            }
+            for i, key in enumerate(keys)
+        ]
+        
+        try:
+            batch = self.client.messages.batches.create(requests=requests_)
+            self.log(f"Submitted batch {batch.id} with {len(requests_)} fix requests")
+            
+            # Poll with exponential backoff until processing ends
+            delay = 5
+            deadline = time.time() + max_wait
+            while batch.processing_status != "ended":
+                if time.time() > deadline:
+                    self.client.messages.batches.cancel(batch.id)
+                    raise TimeoutError(f"batch {batch.id} did not finish within {max_wait}s")
+                try:
+                    _interruptible_sleep(delay, self.stop_event)
+                except AutomationStopped:
+                    self.client.messages.batches.cancel(batch.id)
+                    raise
+                delay = min(delay * 2, 60)
+                batch = self.client.messages.batches.retrieve(batch.id)
+            
+            results = {}
+            for entry in self.client.messages.batches.results(batch.id):
+                index = int(entry.custom_id.split("-", 1)[1])
+                key = keys[index]
+                if entry.result.type == "succeeded":
+                    message = entry.result.message
+                    try:
+                        if message.stop_reason == "max_tokens":
+                            raise ResponseTruncated("response truncated at max_tokens="
+                                                    f"{self.MAX_OUTPUT_TOKENS['fix']}")
+                        results[key] = self._parse_fix_response(message.content[0].text, current_files,
+                                                                attempt, source_files)
+                    except Exception as e:
+                        results[key] = self._failed_fix(e)
+                else:
+                    results[key] = self._failed_fix(f"batch request {entry.result.type}")
+            
+            # Anything missing from the results stream counts as a failure
+            for key in keys:
+                results.setdefault(key, self._failed_fix("no batch result returned"))
+            
+        except AutomationStopped:
+            raise
+        except Exception as e:
+            print(f"Claude batch fix failed: {e}")
+            results = {key: self._failed_fix(e) for key in keys}
+        
+        return {name: results[key] for key in keys for name in groups[key]}
+    
+    def _fix_cache_key(self, error_log: str, current_files: Dict[str, str], attempt: int,
+                       source_files: Dict[str, str] = None) -> str:
+        """Key a fix by the error log tail, the hashes of every input file and
+        the attempt phase. The log is normalized so the same failure on a new
+        run hits; the phase keeps a config-only fix from being replayed once
+        the prompt allows code changes (attempts 1-2, 3-4, then final)"""
+        phase = 0 if attempt <= 2 else 1 if attempt <= 4 else 2
+        file_hashes = {}
+        for files in (current_files, source_files or {}):
+            for path, content in files.items():
+                file_hashes[path] = hashlib.sha256(content.encode()).hexdigest()
+        return ResponseCache.make_key(
+            "fix",
+            str(phase),
+            _normalize_log(_tail_bytes(error_log, self.max_log_bytes)),
+            orjson.dumps(file_hashes, option=orjson.OPT_SORT_KEYS).decode()
+        )
+    
+    def _group_identical_logs(self, error_logs: Dict[str, str],
+                              current_files: Dict[str, str]) -> Dict[str, List[str]]:
+        """Group job names whose error logs would produce the same fix request"""
+        cmake = current_files.get('CMakeLists.txt', '')
+        groups = {}
+        for name, error_log in error_logs.items():
+            key = ResponseCache.make_key(_normalize_log(_tail_bytes(error_log, self.max_log_bytes)), cmake)
+            groups.setdefault(key, []).append(name)
+        return groups
+    
+    def _build_fix_request(self, error_log: str, current_files: Dict[str, str],
+                           attempt: int, source_files: Dict[str, str] = None) -> Dict:
+        """Build the messages.create parameters for a fix request"""
         
         # Include source file snippets if we're on later attempts
         source_context = ""
         if attempt >= 3 and source_files:
-            # Find files mentioned in errors
-            error_files = re.findall(r'([a-zA-Z0-9_/]+\.\w+):\d+:\d+:', error_log)
-            for error_file in set(error_files[:3]):  # Limit to 3 files
-                if error_file in source_files:
-                    source_context += f"\n=== {error_file} (snippet) ===\n"
-                    source_context += source_files[error_file][:1000] + "\n...\n"
+            # Send the code around each reported error in the files mentioned
+            locations = _error_locations(error_log, list(source_files))
+            for error_file, line_numbers in list(locations.items())[:3]:  # Limit to 3 files
+                source_context += f"\n=== {error_file} (around reported lines) ===\n"
+                source_context += _source_excerpt(source_files[error_file], line_numbers[:5]) + "\n"
         
         # If error log is too short or unhelpful, provide more context
         if len(error_log) < 100 or "Could not retrieve" in error_log:
@@ -132,16 +627,18 @@ Common issues to check:
 Current attempt: {attempt}
 Build files were generated but compilation failed."""
         
-        prompt = f"""Build attempt {attempt} failed with these errors:
-
-{error_log[:3000]}  # Truncate for API limits
-
-Current build files:
+        build_files_context = f"""Current build files:
 vcpkg.json: {current_files.get('vcpkg.json', 'N/A')[:500]}
 CMakeLists.txt: {current_files.get('CMakeLists.txt', 'N/A')[:1000]}
-{source_context}
+"""
+        
+        error_context = f"""Build attempt {attempt} failed with these errors:
 
-Please analyze the errors and provide fixes. 
+{_tail_bytes(error_log, self.max_log_bytes)}
+{source_context}
+"""
+        
+        instructions = """Please analyze the build errors below and provide fixes.
 
 IMPORTANT: Follow this priority order:
 1. First 2 attempts: ONLY modify build configuration files (vcpkg.json, CMakeLists.txt, workflow)
@@ -151,68 +648,161 @@ IMPORTANT: Follow this priority order:
 For code changes, provide the EXACT changes needed with clear before/after.
 
 Respond with JSON:
-{{
+{
     "diagnosis": "what went wrong",
     "vcpkg_changes": "new vcpkg.json content or null",
     "cmake_changes": "new CMakeLists.txt content or null",
     "workflow_changes": "new workflow content or null",
-    "code_changes": {{
-        "filename": {{
+    "code_changes": {
+        "filename": {
             "action": "replace|add|remove",
             "find": "exact text to find",
             "replace": "exact replacement text",
             "line_number": optional_line_number,
             "explanation": "why this change is needed"
-        }}
-    }},
+        }
+    },
     "confidence": 0.0 to 1.0,
     "requires_code_change": true/false
-}}"""
+}"""
 
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            json_str = self._extract_json(response.content[0].text)
-            result = json.loads(json_str)
+        content = [
+            {"type": "text", "text": instructions},
+            {"type": "text", "text": build_files_context},
+            {"type": "text", "text": error_context}
+        ]
+
+        return {
+            "model": self.models["fix"],
+            "max_tokens": self.MAX_OUTPUT_TOKENS["fix"],
+            "messages": [
+                {"role": "user", "content": content}
+            ]
+        }
+    
+    def _parse_fix_response(self, text: str, current_files: Dict[str, str],
+                            attempt: int, source_files: Dict[str, str] = None) -> Dict:
+        """Parse Claude's fix response, filling in default fixes if needed"""
+        json_str = self._extract_json(text)
+        result = orjson.loads(json_str)
+        
+        # If we didn't get a proper diagnosis, provide a default one
+        if not result.get('diagnosis') or result.get('diagnosis') == 'Failed to analyze':
+            result['diagnosis'] = "Unable to parse specific error. Attempting common fixes."
+            result['confidence'] = 0.5
             
-            # If we didn't get a proper diagnosis, provide a default one
-            if not result.get('diagnosis') or result.get('diagnosis') == 'Failed to analyze':
-                result['diagnosis'] = "Unable to parse specific error. Attempting common fixes."
-                result['confidence'] = 0.5
+            # Provide some default fixes based on attempt number
+            if attempt == 1:
+                # Try adding more dependencies
+                current_vcpkg = orjson.loads(current_files.get('vcpkg.json', '{}'))
+                current_vcpkg['dependencies'] = list(set(
+                    current_vcpkg.get('dependencies', []) + 
+                    ['boost', 'openssl', 'pthread', 'filesystem']
+                ))
+                result['vcpkg_changes'] = orjson.dumps(current_vcpkg, option=orjson.OPT_INDENT_2).decode()
+            elif attempt == 2:
+                # Try fixing CMakeLists.txt
+                result['cmake_changes'] = self._generate_improved_cmake(current_files, source_files)
+        
+        return result
+    
+    def _failed_fix(self, error) -> Dict:
+        """Fallback fix result when Claude could not analyze the errors"""
+        return {
+            "diagnosis": f"Failed to analyze: {str(error)[:100]}",
+            "confidence": 0.2,
+            "vcpkg_changes": None,
+            "cmake_changes": None,
+            "workflow_changes": None,
+            "code_changes": {},
+            "requires_code_change": False
+        }
+    
+    def _cached_call(self, params: Dict, parse: Callable[[str], Dict], stream: bool = True,
+                     task: Optional[str] = None) -> Dict:
+        """Call Claude, reusing a stored result for an identical model + prompt"""
+        key = ResponseCache.make_key(
+            params["model"],
+            orjson.dumps(params["messages"], option=orjson.OPT_SORT_KEYS).decode()
+        )
+        if self.use_cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.log("INFO: Returning cached response.")
+                return cached
+        
+        self._throttle.consume(self._estimate_input_tokens(params))
+        
+        # Store the parsed result, not the raw response
+        result = self._stream_response(params, parse, stream, task)
+        self._cache.set(key, result, self.cache_ttl)
+        return result
+    
+    @staticmethod
+    def _estimate_input_tokens(params: Dict) -> int:
+        """Rough input token count (~4 characters per token)"""
+        chars = 0
+        for message in params["messages"]:
+            content = message["content"]
+            if isinstance(content, str):
+                chars += len(content)
+            else:
+                chars += sum(len(block.get("text", "")) for block in content)
+        return chars // 4
+    
+    def _stream_response(self, params: Dict, parse: Callable[[str], Dict],
+                         show_stream: bool = True, task: Optional[str] = None) -> Dict:
+        """Stream Claude's response to the UI and parse it as soon as the
+        JSON answer is complete, without waiting for any trailing prose"""
+        callback = self.stream_callback if show_stream else None
+        required = self.REQUIRED_KEYS.get(task)
+        chunks = []
+        with self.client.messages.stream(**params) as stream:
+            for text in stream.text_stream:
+                if self.stop_event is not None and self.stop_event.is_set():
+                    # Leaving the context closes the stream
+                    raise AutomationStopped()
+                chunks.append(text)
+                if callback:
+                    callback(text)
                 
-                # Provide some default fixes based on attempt number
-                if attempt == 1:
-                    # Try adding more dependencies
-                    current_vcpkg = json.loads(current_files.get('vcpkg.json', '{}'))
-                    current_vcpkg['dependencies'] = list(set(
-                        current_vcpkg.get('dependencies', []) + 
-                        ['boost', 'openssl', 'pthread', 'filesystem']
-                    ))
-                    result['vcpkg_changes'] = json.dumps(current_vcpkg, indent=2)
-                elif attempt == 2:
-                    # Try fixing CMakeLists.txt
-                    result['cmake_changes'] = self._generate_improved_cmake(current_files, source_files)
+                # A closing fence means the JSON block may be complete; only
+                # a ```json block carrying the task's keys is the answer
+                if required and '`' in text:
+                    result = self._parse_answer_block("".join(chunks), parse, required)
+                    if result is not None:
+                        # Leaving the context closes the stream early
+                        if callback:
+                            callback("\n")
+                        return result
             
-            return result
-            
-        except Exception as e:
-            print(f"Claude error fix failed: {e}")
-            # Return a more helpful fallback
-            return {
-                "diagnosis": f"Failed to analyze: {str(e)[:100]}",
-                "confidence": 0.2,
-                "vcpkg_changes": None,
-                "cmake_changes": None,
-                "workflow_changes": None,
-                "code_changes": {},
-                "requires_code_change": False
-            }
+            message = stream.get_final_message()
+        
+        if callback:
+            callback("\n")
+        # Cut-off JSON would only fail to parse
+        if message.stop_reason == "max_tokens":
+            raise ResponseTruncated(f"response truncated at max_tokens={params['max_tokens']}")
+        text = "".join(chunks)
+        result = self._parse_answer_block(text, parse, required) if required else None
+        return result if result is not None else parse(text)
+    
+    @staticmethod
+    def _parse_answer_block(text: str, parse: Callable[[str], Dict],
+                            required: Tuple[str, ...]) -> Optional[Dict]:
+        """Parse the first complete ```json block that has all required keys,
+        or return None if there is none yet"""
+        for match in _JSON_FENCED.finditer(text):
+            try:
+                answer = orjson.loads(match.group(1))
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(answer, dict) and all(key in answer for key in required):
+                try:
+                    return parse(match.group(0))
+                except Exception:
+                    return None
+        return None
     
     def _generate_improved_cmake(self, current_files: Dict, source_files: Dict = None) -> str:
         """Generate an improved CMakeLists.txt based on available files"""
@@ -264,27 +854,7 @@ endif()
     def _extract_json(self, text: str) -> str:
         """Extract JSON from Claude's response"""
         # Try to find JSON between ```json and ``` or just ```
-        import re
-        
-        # Pattern 1: ```json ... ```
-        pattern1 = r'```json\s*(.*?)\s*```'
-        match = re.search(pattern1, text, re.DOTALL)
-        if match:
-            return match.group(1)
-        
-        # Pattern 2: ``` ... ```  
-        pattern2 = r'```\s*(.*?)\s*```'
-        match = re.search(pattern2, text, re.DOTALL)
-        if match:
-            return match.group(1)
-        
-        # Pattern 3: Raw JSON
-        pattern3 = r'\{.*\}'
-        match = re.search(pattern3, text, re.DOTALL)
-        if match:
-            return match.group(0)
-        
-        return text
+        return _extract_json_text(text)
     
     def _fallback_analysis(self, files: Dict[str, str]) -> Dict:
         """Fallback analysis if Claude fails"""
@@ -295,15 +865,10 @@ endif()
             if filename.endswith(('.cpp', '.cc')):
                 source_files.append(filename)
             
-            # Basic dependency detection
-            if '#include <boost' in content:
-                dependencies.add('boost')
-            if '#include <openssl' in content:
-                dependencies.add('openssl')
-            if '#include <curl' in content:
-                dependencies.add('curl')
-            if 'nlohmann/json' in content:
-                dependencies.add('nlohmann-json')
+            # Basic dependency detection - one scan over the file's includes
+            for include_dir in _INCLUDE_DIR_RE.findall(content):
+                if include_dir in _HEADER_DEPENDENCIES:
+                    dependencies.add(_HEADER_DEPENDENCIES[include_dir])
         
         return {
             'dependencies': list(dependencies),
@@ -317,43 +882,31 @@ endif()
         # Basic templates
         vcpkg = {
             "name": project_name.lower().replace(" ", "-"),
-            "version": "1.0.0",
+            "version": _VCPKG_VERSION,
             "dependencies": analysis.get('dependencies', [])
         }
         
-        cmake = f"""cmake_minimum_required(VERSION 3.16)
-project({project_name})
-
-set(CMAKE_CXX_STANDARD {analysis.get('cpp_standard', '17')})
-set(CMAKE_CXX_STANDARD_REQUIRED ON)
-
-add_executable({project_name} {' '.join(analysis.get('source_files', []))})
-"""
-        
-        workflow = f"""name: Build
-on: [push, pull_request]
-jobs:
-  build:
-    runs-on: ubuntu-latest
-    steps:
-    - uses: actions/checkout@v3
-    - name: Build
-      run: |
-        mkdir build && cd build
-        cmake .. && make
-"""
+        cmake = _CMAKE_TEMPLATE.format(
+            project=project_name,
+            std=analysis.get('cpp_standard', '17'),
+            sources=' '.join(analysis.get('source_files', []))
+        )
         
         return {
-            'vcpkg.json': json.dumps(vcpkg, indent=2),
+            'vcpkg.json': orjson.dumps(vcpkg, option=orjson.OPT_INDENT_2).decode(),
             'CMakeLists.txt': cmake,
-            'workflow.yml': workflow
+            'workflow.yml': _WORKFLOW_TEMPLATE
         }
 
 class GitHubAPI:
     """GitHub API client for repository operations"""
     
-    def __init__(self, token: str, repo_url: str):
+    def __init__(self, token: str, repo_url: str, pool_size: int = 20,
+                 extra_tokens: Optional[List[str]] = None,
+                 stop_event: Optional[threading.Event] = None):
         self.token = token
+        # Set when the user stops; rate-limit waits give up on it
+        self.stop_event = stop_event
         self.headers = {
             'Authorization': f'token {token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -364,38 +917,222 @@ class GitHubAPI:
         self.owner = parts[0]
         self.repo = parts[1]
         self.base_url = f"https://api.github.com/repos/{self.owner}/{self.repo}"
+        self.graphql_url = "https://api.github.com/graphql"
+        
+        # Pooled keep-alive connections, retrying transient server errors
+        # and 429s (waiting out Retry-After). Size the pool to the caller's
+        # concurrency so parallel fetches reuse connections instead of
+        # opening and discarding extras
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+                # Hand back the last response once retries run out, so
+                # callers' status_code checks still apply
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.headers)
+        # Every response, including redirects followed for log downloads,
+        # updates the rate limit state
+        self.session.hooks['response'].append(self._check_rate_limit)
+        
+        # Blob contents keyed by git blob SHA, shared across runs
+        self.blob_cache = ResponseCache(".cicd_cache")
+        
+        self._default_branch = None
+        
+        # Requests round-robin over every token; one that runs low is parked
+        # in a heap of (reset_time, token) until its window resets
+        self._tokens = list(dict.fromkeys([token] + (extra_tokens or [])))
+        self._token_cycle = itertools.cycle(self._tokens)
+        self._exhausted = []
+        self._token_lock = threading.Lock()
+        
+        # Last seen X-RateLimit-Remaining, for display
+        self.rate_limit_remaining = None
+        # run_id -> (ETag, status) for conditional status polling
+        self._run_status_cache = {}
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the shared session with the next usable token"""
+        kwargs['headers'] = {**kwargs.get('headers', {}),
+                             'Authorization': f'token {self._next_token()}'}
+        # Bounded, so a stopped worker is never stuck on a dead connection
+        kwargs.setdefault('timeout', 30)
+        return self.session.request(method, url, **kwargs)
+    
+    def _next_token(self) -> str:
+        """Next token in rotation, sleeping until a reset if all are exhausted"""
+        with self._token_lock:
+            # Tokens whose window has reset are usable again
+            while self._exhausted and self._exhausted[0][0] <= time.time():
+                heapq.heappop(self._exhausted)
+            exhausted = {token for _, token in self._exhausted}
+            if len(exhausted) < len(self._tokens):
+                token = next(self._token_cycle)
+                while token in exhausted:
+                    token = next(self._token_cycle)
+                return token
+            reset, token = self._exhausted[0]
+        
+        sleep_for = max(reset - time.time() + 1, 0)
+        print(f"GitHub rate limit nearly exhausted, sleeping {sleep_for:.0f}s")
+        _interruptible_sleep(sleep_for, self.stop_event)
+        return token
+    
+    def _check_rate_limit(self, response: requests.Response, *args, **kwargs):
+        """Park the token that sent this request when few requests remain"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        self.rate_limit_remaining = int(remaining)
+        if self.rate_limit_remaining < 5:
+            token = response.request.headers.get('Authorization', '').split(' ')[-1]
+            with self._token_lock:
+                if all(parked != token for _, parked in self._exhausted):
+                    heapq.heappush(self._exhausted, (int(reset), token))
     
     def get_file(self, path: str) -> Optional[str]:
         """Get file content from repository"""
         url = f"{self.base_url}/contents/{path}"
-        response = requests.get(url, headers=self.headers)
+        response = self._request('GET', url)
         if response.status_code == 200:
-            content = response.json()['content']
-            return base64.b64decode(content).decode('utf-8')
+            return _b64decode(response.json()['content']).decode('utf-8')
         return None
     
-    def create_or_update_file(self, path: str, content: str, message: str) -> bool:
-        """Create or update file in repository"""
-        url = f"{self.base_url}/contents/{path}"
-        
-        # Check if file exists
-        response = requests.get(url, headers=self.headers)
-        sha = response.json().get('sha') if response.status_code == 200 else None
+    def get_default_branch(self) -> Optional[str]:
+        """Name of the repository's default branch (looked up once)"""
+        if self._default_branch is None:
+            response = self._request('GET', self.base_url)
+            if response.status_code == 200:
+                self._default_branch = response.json().get('default_branch', 'main')
+        return self._default_branch
+    
+    def get_tree_recursive(self, ref: Optional[str] = None) -> Optional[List[Dict]]:
+        """List every entry in the repository tree with a single request.
+        Returns None if the listing failed or GitHub truncated it."""
+        if ref is None:
+            ref = self.get_default_branch()
+            if ref is None:
+                return None
+        
+        url = f"{self.base_url}/git/trees/{ref}"
+        response = self._request('GET', url, params={'recursive': 1})
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if data.get('truncated'):
+            return None
+        return data.get('tree', [])
+    
+    def get_files_bulk(self, blob_shas: Dict[str, str], batch_size: int = 50) -> Dict[str, str]:
+        """Get the contents of many files (path -> blob SHA in) with one
+        GraphQL request per batch. Blobs are looked up by SHA rather than
+        HEAD:path, so content matches the SHA even if the branch has moved"""
+        paths = list(blob_shas)
+        files = {}
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            
+            # One aliased object() lookup per file
+            declarations = ", ".join(f"$o{i}: GitObjectID!" for i in range(len(batch)))
+            fields = " ".join(
+                f"f{i}: object(oid: $o{i}) {{ ... on Blob {{ text }} }}"
+                for i in range(len(batch))
+            )
+            query = (f"query($owner: String!, $name: String!, {declarations}) "
+                     f"{{ repository(owner: $owner, name: $name) {{ {fields} }} }}")
+            variables = {"owner": self.owner, "name": self.repo}
+            variables.update({f"o{i}": blob_shas[path] for i, path in enumerate(batch)})
+            
+            response = self._request('POST', self.graphql_url,
+                                     json={"query": query, "variables": variables})
+            if response.status_code != 200:
+                continue
+            
+            repository = (response.json().get('data') or {}).get('repository') or {}
+            for i, path in enumerate(batch):
+                blob = repository.get(f"f{i}")
+                # text is null for binary blobs
+                if blob and blob.get('text') is not None:
+                    files[path] = blob['text']
+        return files
+    
+    def get_files_cached(self, blob_shas: Dict[str, str]) -> Dict[str, str]:
+        """Get file contents (path -> blob SHA in), reusing cached blobs
+        whose SHA is unchanged and bulk-fetching only the rest"""
+        files = {}
+        for path, sha in blob_shas.items():
+            content = self.blob_cache.get(sha)
+            if content is not None:
+                files[path] = content
         
-        data = {
-            'message': message,
-            'content': base64.b64encode(content.encode()).decode(),
-        }
-        if sha:
-            data['sha'] = sha
+        missing = {path: sha for path, sha in blob_shas.items() if path not in files}
+        fetched = self.get_files_bulk(missing) if missing else {}
+        for path, content in fetched.items():
+            self.blob_cache.set(blob_shas[path], content)
         
-        response = requests.put(url, headers=self.headers, json=data)
-        return response.status_code in [200, 201]
+        files.update(fetched)
+        return files
+    
+    def commit_files(self, changes: Dict[str, str], message: str) -> bool:
+        """Commit several files to the default branch as a single commit via
+        the Git Data API, so the push triggers one workflow run"""
+        branch = self.get_default_branch()
+        if branch is None or not changes:
+            return False
+        
+        ref_url = f"{self.base_url}/git/refs/heads/{branch}"
+        response = self._request('GET', ref_url)
+        if response.status_code != 200:
+            return False
+        head_sha = response.json()['object']['sha']
+        
+        response = self._request('GET', f"{self.base_url}/git/commits/{head_sha}")
+        if response.status_code != 200:
+            return False
+        base_tree = response.json()['tree']['sha']
+        
+        def create_blob(content):
+            response = self._request('POST', f"{self.base_url}/git/blobs",
+                                     json={'content': _b64encode(content.encode()), 'encoding': 'base64'})
+            return response.json().get('sha') if response.status_code == 201 else None
+        
+        # Blobs are independent of each other - upload them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(changes), 8)) as executor:
+            blob_shas = dict(zip(changes, executor.map(create_blob, changes.values())))
+        if not all(blob_shas.values()):
+            return False
+        
+        tree = [{'path': path, 'mode': '100644', 'type': 'blob', 'sha': sha}
+                for path, sha in blob_shas.items()]
+        response = self._request('POST', f"{self.base_url}/git/trees",
+                                 json={'base_tree': base_tree, 'tree': tree})
+        if response.status_code != 201:
+            return False
+        
+        response = self._request('POST', f"{self.base_url}/git/commits",
+                                 json={'message': message, 'tree': response.json()['sha'],
+                                       'parents': [head_sha]})
+        if response.status_code != 201:
+            return False
+        
+        response = self._request('PATCH', ref_url,
+                                 json={'sha': response.json()['sha']})
+        return response.status_code == 200
     
     def list_files(self, path: str = "") -> List[Dict]:
         """List files in repository"""
         url = f"{self.base_url}/contents/{path}"
-        response = requests.get(url, headers=self.headers)
+        response = self._request('GET', url)
         if response.status_code == 200:
             return response.json()
         return []
@@ -403,76 +1140,218 @@ class GitHubAPI:
     def get_workflow_runs(self) -> List[Dict]:
         """Get recent workflow runs"""
         url = f"{self.base_url}/actions/runs"
-        response = requests.get(url, headers=self.headers, params={'per_page': 5})
+        response = self._request('GET', url, params={'per_page': 5})
         if response.status_code == 200:
             return response.json().get('workflow_runs', [])
         return []
     
-    def get_run_logs(self, run_id: int) -> str:
-        """Get logs for a workflow run"""
+    def list_run_jobs(self, run_id: int) -> List[Dict]:
+        """List the jobs of a workflow run"""
+        jobs_url = f"{self.base_url}/actions/runs/{run_id}/jobs"
+        response = self._request('GET', jobs_url)
+        if response.status_code == 200:
+            return response.json().get('jobs', [])
+        return []
+    
+    def cancel_run(self, run_id: int) -> bool:
+        """Cancel a workflow run that is still in progress"""
+        response = self._request('POST', f"{self.base_url}/actions/runs/{run_id}/cancel")
+        return response.status_code == 202
+    
+    def get_run_logs(self, run_id: int, max_bytes: int = 32768) -> str:
+        """Get the error-focused logs of a workflow run's failed jobs"""
+        failed_jobs = [job for job in self.list_run_jobs(run_id)
+                       if job.get('conclusion') == 'failure']
+        
         # First try to get the logs URL
         url = f"{self.base_url}/actions/runs/{run_id}/logs"
-        response = requests.get(url, headers=self.headers, allow_redirects=True)
+        response = self._request('GET', url, allow_redirects=True)
         
         if response.status_code == 200:
             # For GitHub Actions, logs come as a zip file
-            # We need to handle this properly
-            import zipfile
-            import io
-            
             try:
                 # Create a file-like object from the response content
                 zip_file = zipfile.ZipFile(io.BytesIO(response.content))
+                members = self._failed_log_members(zip_file.namelist(),
+                                                   [job.get('name', '') for job in failed_jobs])
                 
-                # Extract and combine all log files
+                # Extract only the failed jobs' logs, trimmed to their errors
                 all_logs = []
-                for filename in zip_file.namelist():
+                for filename in members:
                     with zip_file.open(filename) as log_file:
                         content = log_file.read().decode('utf-8', errors='ignore')
-                        all_logs.append(f"=== {filename} ===\n{content}\n")
+                        all_logs.append(f"=== {filename} ===\n{_focus_log(content, max_bytes)}\n")
                 
-                return '\n'.join(all_logs)
+                return _tail_bytes('\n'.join(all_logs), max_bytes)
             except Exception as e:
                 print(f"Error extracting logs: {e}")
                 # Try to return raw content if zip extraction fails
                 return response.text if response.text else str(response.content)
         else:
-            # If logs aren't available, try to get job details
-            jobs_url = f"{self.base_url}/actions/runs/{run_id}/jobs"
-            jobs_response = requests.get(jobs_url, headers=self.headers)
+            # If logs aren't available, summarize the failed jobs
+            error_summary = []
             
-            if jobs_response.status_code == 200:
-                jobs = jobs_response.json().get('jobs', [])
-                error_summary = []
-                
-                for job in jobs:
-                    if job.get('conclusion') == 'failure':
-                        error_summary.append(f"Job '{job.get('name')}' failed")
-                        
-                        # Get the steps that failed
-                        if 'steps' in job:
-                            for step in job['steps']:
-                                if step.get('conclusion') == 'failure':
-                                    error_summary.append(f"  Failed step: {step.get('name')}")
+            for job in failed_jobs:
+                error_summary.append(f"Job '{job.get('name')}' failed")
                 
-                if error_summary:
-                    return "Build failed. Summary:\n" + '\n'.join(error_summary)
+                # Get the steps that failed
+                if 'steps' in job:
+                    for step in job['steps']:
+                        if step.get('conclusion') == 'failure':
+                            error_summary.append(f"  Failed step: {step.get('name')}")
+            
+            if error_summary:
+                return "Build failed. Summary:\n" + '\n'.join(error_summary)
             
             return f"Could not retrieve logs for run {run_id}"
     
+    @staticmethod
+    def _failed_log_members(names: List[str], failed_job_names: List[str]) -> List[str]:
+        """Pick the zip members holding failed jobs' logs. The archive has a
+        combined '<n>_<job>.txt' per job plus per-step '<job>/<n>_<step>.txt'
+        files, so prefer the combined ones to avoid duplicates."""
+        if not failed_job_names:
+            return names
+        
+        matching = [name for name in names
+                    if any(job_name and job_name in name for job_name in failed_job_names)]
+        combined = [name for name in matching if '/' not in name]
+        return combined or matching or names
+    
+    def get_failed_job_logs(self, run_id: int, max_bytes: int = 32768) -> Dict[str, str]:
+        """Get error-focused logs of each failed job in a workflow run, keyed by job name"""
+        failed_jobs = [job for job in self.list_run_jobs(run_id)
+                       if job.get('conclusion') == 'failure']
+        if not failed_jobs:
+            return {}
+        
+        def fetch_job_log(job):
+            log_url = f"{self.base_url}/actions/jobs/{job['id']}/logs"
+            log_response = self._request('GET', log_url, allow_redirects=True)
+            if log_response.status_code != 200:
+                return None
+            return _focus_log(log_response.text, max_bytes)
+        
+        # One download per OS runner - fetch them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(failed_jobs), 8)) as executor:
+            job_logs = list(executor.map(fetch_job_log, failed_jobs))
+        
+        return {
+            job.get('name', str(job['id'])): log
+            for job, log in zip(failed_jobs, job_logs)
+            if log is not None
+        }
+    
+    def create_webhook(self, url: str, secret: str) -> Optional[int]:
+        """Register a workflow_run webhook, returning its id"""
+        data = {
+            'name': 'web',
+            'active': True,
+            'events': ['workflow_run'],
+            'config': {'url': url, 'content_type': 'json', 'secret': secret}
+        }
+        response = self._request('POST', f"{self.base_url}/hooks", json=data)
+        if response.status_code == 201:
+            return response.json().get('id')
+        return None
+    
+    def delete_webhook(self, hook_id: int) -> bool:
+        """Remove a webhook registered with create_webhook"""
+        response = self._request('DELETE', f"{self.base_url}/hooks/{hook_id}")
+        return response.status_code == 204
+    
     def get_run_status(self, run_id: int) -> Dict:
         """Get status of a workflow run"""
         url = f"{self.base_url}/actions/runs/{run_id}"
-        response = requests.get(url, headers=self.headers)
+        
+        # Conditional request: an unchanged run answers 304, which does not
+        # count against the rate limit
+        headers = {}
+        cached = self._run_status_cache.get(run_id)
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        
+        response = self._request('GET', url, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
         if response.status_code == 200:
             data = response.json()
-            return {
+            status = {
                 'status': data.get('status'),
                 'conclusion': data.get('conclusion'),
                 'url': data.get('html_url')
             }
+            if response.headers.get('ETag'):
+                self._run_status_cache[run_id] = (response.headers['ETag'], status)
+            return status
         return {}
 
+class WorkflowWebhookServer:
+    """Receives GitHub workflow_run webhooks so the monitor can wake up on
+    run events instead of sleeping between status polls"""
+    
+    def __init__(self, port: int, secret: str):
+        self.secret = secret.encode()
+        # Set when GitHub reports a newly requested run
+        self.run_requested = threading.Event()
+        self._completed = {}
+        self._lock = threading.Lock()
+        
+        coordinator = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                expected = "sha256=" + hmac.new(coordinator.secret, body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(expected, self.headers.get('X-Hub-Signature-256', '')):
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                
+                self.send_response(204)
+                self.end_headers()
+                if self.headers.get('X-GitHub-Event') == 'workflow_run':
+                    coordinator._handle_workflow_run(orjson.loads(body))
+            
+            def log_message(self, format, *args):
+                pass  # Keep webhook traffic out of the console
+        
+        self._server = ThreadingHTTPServer(('', port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    def start(self):
+        """Start listening on a background thread"""
+        self._thread.start()
+    
+    def stop(self):
+        """Stop listening"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def _handle_workflow_run(self, payload: Dict):
+        """Record run events from a workflow_run delivery"""
+        action = payload.get('action')
+        run_id = payload.get('workflow_run', {}).get('id')
+        if action == 'requested':
+            self.run_requested.set()
+        elif action == 'completed' and run_id is not None:
+            self._completion_event(run_id).set()
+    
+    def _completion_event(self, run_id: int) -> threading.Event:
+        with self._lock:
+            return self._completed.setdefault(run_id, threading.Event())
+    
+    def wait_for_completion(self, run_id: int, timeout: float) -> bool:
+        """Block until the run completes or timeout elapses"""
+        return self._completion_event(run_id).wait(timeout)
+    
+    def wake(self):
+        """Release every waiter, e.g. when automation is stopped"""
+        self.run_requested.set()
+        with self._lock:
+            for event in self._completed.values():
+                event.set()
+
 class ConfigManager:
     """Manages configuration from config.json"""
     
@@ -491,7 +1370,15 @@ class ConfigManager:
                 "github_timeout": 300,
                 "auto_commit": True,
                 "verbose_logging": True,
-                "claude_model": "claude-sonnet-4-20250514"
+                "use_batch_api": False,
+                "cache_ttl": 604800,
+                "no_cache": False,
+                "input_tokens_per_minute": 40000,
+                "claude_model": "claude-sonnet-4-20250514",
+                "max_log_bytes": 32768,
+                "webhook_url": "",
+                "webhook_port": 8765,
+                "exclude_dirs": list(_DEFAULT_EXCLUDE_DIRS)
             }
             ConfigManager.save_config(default_config)
             return default_config
@@ -526,21 +1413,34 @@ class BuildAutomationGUI:
         # Variables
         self.repo_url = tk.StringVar()
         self.project_name = tk.StringVar(value="MyProject")
-        self.automation_running = False
+        # Set while automation is not running; worker waits block on it so
+        # a stop takes effect immediately
+        self._stop = threading.Event()
+        self._stop.set()
         
         # Services
         self.claude = None
         self.github = None
+        self.webhook = None
+        self._webhook_id = None
+        
+        # Log output is queued by worker threads and drained on the Tk thread
+        self._log_queue = queue.SimpleQueue()
+        
+        # Pending debounced config write
+        self._save_after_id = None
+        
+        # A single worker runs the automation, so runs never overlap
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._current = None
         
         self.setup_ui()
+        self.root.after(50, self._drain_logs)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def create_env_file(self):
         """Create .env file if it doesn't exist"""
-        if not Path('.env').exists():
-            with open('.env', 'w') as f:
-                f.write("# API Keys for C++ Build Automation\n")
-                f.write("ANTHROPIC_API_KEY=your_claude_api_key_here\n")
-                f.write("GITHUB_TOKEN=your_github_token_here\n")
+        if _write_default_env():
             messagebox.showinfo("Setup Required", 
                               ".env file created. Please add your API keys and restart.")
     
@@ -684,6 +1584,16 @@ class BuildAutomationGUI:
                        variable=self.verbose_var,
                        command=self.update_config).grid(row=3, column=0, columnspan=2, pady=5)
         
+        self.batch_api_var = tk.BooleanVar(value=self.config.get('use_batch_api', False))
+        ttk.Checkbutton(settings_frame, text="Batch multi-OS fixes (Message Batches API)",
+                       variable=self.batch_api_var,
+                       command=self.update_config).grid(row=4, column=0, columnspan=2, pady=5)
+        
+        self.no_cache_var = tk.BooleanVar(value=self.config.get('no_cache', False))
+        ttk.Checkbutton(settings_frame, text="Bypass cached Claude responses (--no-cache)",
+                       variable=self.no_cache_var,
+                       command=self.update_config).grid(row=5, column=0, columnspan=2, pady=5)
+        
         # API Keys Section
         api_frame = ttk.LabelFrame(parent, text="API Configuration", padding="10")
         api_frame.pack(fill='x', padx=10, pady=10)
@@ -701,16 +1611,26 @@ class BuildAutomationGUI:
         self.config['github_timeout'] = self.timeout_var.get()
         self.config['auto_commit'] = self.auto_commit_var.get()
         self.config['verbose_logging'] = self.verbose_var.get()
+        self.config['use_batch_api'] = self.batch_api_var.get()
+        self.config['no_cache'] = self.no_cache_var.get()
+        
+        # Coalesce rapid changes (e.g. spinbox clicks) into one write
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+        self._save_after_id = self.root.after(300, self._actually_save_config)
+    
+    def _actually_save_config(self):
+        """Write config.json once settings have stopped changing"""
+        self._save_after_id = None
         ConfigManager.save_config(self.config)
     
     def open_env_file(self):
         """Open .env file in default editor"""
-        import platform
         env_path = Path('.env')
         if env_path.exists():
-            if platform.system() == 'Windows':
+            if _IS_WINDOWS:
                 os.startfile(env_path)
-            elif platform.system() == 'Darwin':  # macOS
+            elif _IS_MAC:
                 subprocess.run(['open', env_path])
             else:  # Linux
                 subprocess.run(['xdg-open', env_path])
@@ -739,17 +1659,62 @@ class BuildAutomationGUI:
         """Add message to log"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] [{level}] {message}\n"
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self._log_queue.put(('log', (f"[{level}] {message}", log_entry)))
     
     def claude_log(self, message: str):
         """Add message to Claude's thinking pane"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] 🤖 {message}\n"
-        self.claude_text.insert(tk.END, log_entry)
-        self.claude_text.see(tk.END)
-        self.root.update_idletasks()
+        self._log_queue.put(('claude', (message, log_entry)))
+    
+    def claude_stream(self, text: str):
+        """Append streamed response text to Claude's thinking pane as-is"""
+        # No key: streamed fragments are never collapsed
+        self._log_queue.put(('claude', (None, text)))
+    
+    def _drain_logs(self):
+        """Flush queued log output to the UI in one batch, then re-arm"""
+        batches = {'log': [], 'claude': []}
+        status = None
+        running = None
+        for _ in range(200):
+            try:
+                target, payload = self._log_queue.get_nowait()
+            except queue.Empty:
+                break
+            if target == 'status':
+                status = payload
+                continue
+            if target == 'controls':
+                running = payload
+                continue
+            
+            # Collapse consecutive repeats of a line (ignoring its
+            # timestamp) into one entry with a count
+            key, text = payload
+            batch = batches[target]
+            if key is not None and batch and batch[-1][0] == key:
+                batch[-1][2] += 1
+            else:
+                batch.append([key, text, 1])
+        
+        for target, widget in (('log', self.log_text), ('claude', self.claude_text)):
+            if batches[target]:
+                widget.insert(tk.END, "".join(
+                    text if count == 1 else f"{text.rstrip()} (x{count})\n"
+                    for _, text, count in batches[target]
+                ))
+                widget.see(tk.END)
+        
+        # Only the most recent status is worth drawing
+        if status:
+            message, color = status
+            self.status_label.config(text=message, foreground=color)
+        
+        if running is not None:
+            self._set_controls(running)
+        
+        self.root.after(50, self._drain_logs)
     
     def clear_log(self):
         """Clear both log outputs"""
@@ -770,13 +1735,26 @@ class BuildAutomationGUI:
                 f.write(self.log_text.get(1.0, tk.END))
             messagebox.showinfo("Export Complete", f"Logs exported to {filename}")
     
+    def _set_controls(self, running: bool):
+        """Enable Start or Stop and run the progress bar to match (Tk thread only)"""
+        self.start_button.config(state='disabled' if running else 'normal')
+        self.stop_button.config(state='normal' if running else 'disabled')
+        if running:
+            self.progress.start()
+        else:
+            self.progress.stop()
+    
     def update_status(self, message: str, color: str = "black"):
         """Update status label"""
-        self.status_label.config(text=message, foreground=color)
-        self.root.update_idletasks()
+        self._log_queue.put(('status', (message, color)))
     
     def start_automation(self):
         """Start the Claude-coordinated automation"""
+        # A stopped run finishes its current request before exiting
+        if self._current is not None and not self._current.done():
+            messagebox.showinfo("Please wait", "The previous run is still stopping")
+            return
+        
         # Validate inputs
         if not self.env_vars['ANTHROPIC_API_KEY']:
             messagebox.showerror("Error", "Please add ANTHROPIC_API_KEY to .env file")
@@ -791,29 +1769,61 @@ class BuildAutomationGUI:
             return
         
         # Initialize services
-        self.claude = ClaudeCoordinator(self.env_vars['ANTHROPIC_API_KEY'])
-        self.github = GitHubAPI(self.env_vars['GITHUB_TOKEN'], self.repo_url.get())
+        self.claude = ClaudeCoordinator(
+            self.env_vars['ANTHROPIC_API_KEY'],
+            self.claude_log,
+            cache_ttl=self.config.get('cache_ttl', 604800),
+            use_cache=not self.config.get('no_cache', False),
+            stream_callback=self.claude_stream,
+            input_tokens_per_minute=self.config.get('input_tokens_per_minute', 40000),
+            models=self.config.get('models'),
+            stop_event=self._stop,
+            max_log_bytes=self.config.get('max_log_bytes', 32768)
+        )
+        self.github = GitHubAPI(
+            self.env_vars['GITHUB_TOKEN'],
+            self.repo_url.get(),
+            pool_size=self.config.get('fetch_concurrency', 16),
+            # Optional comma-separated tokens to spread the rate limit over
+            extra_tokens=[t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()],
+            stop_event=self._stop
+        )
         
         # Start automation
-        self.automation_running = True
-        self.start_button.config(state='disabled')
-        self.stop_button.config(state='normal')
-        self.progress.start()
+        self._stop.clear()
+        self._set_controls(True)
         
-        # Run in thread
-        thread = threading.Thread(target=self.run_claude_automation)
-        thread.daemon = True
-        thread.start()
+        # Run on the worker thread
+        self._current = self._pool.submit(self.run_claude_automation)
     
     def stop_automation(self):
         """Stop the automation"""
-        self.automation_running = False
-        self.start_button.config(state='normal')
-        self.stop_button.config(state='disabled')
-        self.progress.stop()
+        self._stop.set()
+        if self.webhook is not None:
+            self.webhook.wake()
+        if self._current is not None:
+            self._current.cancel()
+        self._set_controls(False)
         self.update_status("Stopped", "red")
         self.log("Automation stopped by user", "WARNING")
     
+    def on_close(self):
+        """Save pending settings and stop the worker before closing"""
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+            self._actually_save_config()
+        
+        self._stop.set()
+        if self.webhook is not None:
+            self.webhook.wake()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
+    def _sleep(self, seconds: float) -> bool:
+        """Sleep on the worker thread, cut short when automation is stopped.
+        Returns False if automation was stopped"""
+        return not self._stop.wait(seconds)
+    
     def run_claude_automation(self):
         """Main automation loop coordinated by Claude"""
         try:
@@ -852,22 +1862,29 @@ class BuildAutomationGUI:
                 self.config['target_os']
             )
             
+            # Listen for run events before pushing triggers the first run
+            self._start_webhook()
+            
             # Step 4: Push files to repository
             self.log("Step 4: Pushing build files to repository...")
             current_files = {}
             
-            for filename, content in [
-                ('vcpkg.json', build_files.get('vcpkg.json')),
-                ('CMakeLists.txt', build_files.get('CMakeLists.txt')),
-                ('.github/workflows/build.yml', build_files.get('workflow.yml'))
-            ]:
-                if content:
-                    if self.github.create_or_update_file(filename, content,
-                                                        f"Claude: Add/Update {filename}"):
-                        self.log(f"Created {filename}")
-                        current_files[filename] = content
-                    else:
-                        self.log(f"Failed to create {filename}", "ERROR")
+            files_to_push = [
+                (filename, content) for filename, content in [
+                    ('vcpkg.json', build_files.get('vcpkg.json')),
+                    ('CMakeLists.txt', build_files.get('CMakeLists.txt')),
+                    ('.github/workflows/build.yml', build_files.get('workflow.yml'))
+                ] if content
+            ]
+            
+            # One commit for all build files, so only one workflow run starts
+            if self.github.commit_files(dict(files_to_push), "Claude: Add/Update build files"):
+                for filename, content in files_to_push:
+                    self.log(f"Created {filename}")
+                    current_files[filename] = content
+            else:
+                for filename, _ in files_to_push:
+                    self.log(f"Failed to create {filename}", "ERROR")
             
             self.claude_log("Build files created and pushed to repository")
             
@@ -875,58 +1892,147 @@ class BuildAutomationGUI:
             self.log("Step 5: Monitoring builds and applying Claude's fixes...")
             self.monitor_and_fix_with_claude(current_files)
             
+        except AutomationStopped:
+            pass  # Stop was already reported by stop_automation
         except Exception as e:
             self.log(f"Automation failed: {str(e)}", "ERROR")
             self.claude_log(f"Error encountered: {str(e)}")
             self.update_status("Failed", "red")
         finally:
-            self.automation_running = False
-            self.start_button.config(state='normal')
-            self.stop_button.config(state='disabled')
-            self.progress.stop()
+            self._stop_webhook()
+            self._stop.set()
+            # Widgets belong to the Tk thread - hand the reset to the drain
+            self._log_queue.put(('controls', False))
+    
+    def _start_webhook(self):
+        """Start the workflow_run webhook receiver when a public URL is configured"""
+        webhook_url = self.config.get('webhook_url')
+        if not webhook_url:
+            return
+        
+        secret = secrets.token_hex(32)
+        try:
+            self.webhook = WorkflowWebhookServer(self.config.get('webhook_port', 8765), secret)
+        except OSError as e:
+            self.log(f"Could not start webhook receiver: {e}", "WARNING")
+            return
+        self.webhook.start()
+        
+        self._webhook_id = self.github.create_webhook(webhook_url, secret)
+        if self._webhook_id is None:
+            self.log("Could not register webhook, falling back to polling", "WARNING")
+            self.webhook.stop()
+            self.webhook = None
+        else:
+            self.log(f"Listening for workflow events via {webhook_url}")
+    
+    def _stop_webhook(self):
+        """Unregister the webhook and stop the receiver"""
+        if self._webhook_id is not None:
+            self.github.delete_webhook(self._webhook_id)
+            self._webhook_id = None
+        if self.webhook is not None:
+            self.webhook.stop()
+            self.webhook = None
     
     def fetch_code_files(self) -> Dict[str, str]:
         """Fetch all C++ related files from repository"""
-        files = {}
+        exclude_dirs = set(self.config.get('exclude_dirs', _DEFAULT_EXCLUDE_DIRS))
+        
+        with ThreadPoolExecutor(max_workers=self.config.get('fetch_concurrency', 16)) as executor:
+            # One request lists the whole tree; very large repositories get a
+            # truncated listing, so fall back to walking directories
+            tree = self.github.get_tree_recursive()
+            if tree is not None:
+                blob_shas = {
+                    entry['path']: entry['sha'] for entry in tree
+                    if entry['type'] == 'blob' and _CPP_PATH_RE.fullmatch(entry['path'])
+                    and exclude_dirs.isdisjoint(entry['path'].split('/')[:-1])
+                }
+            else:
+                blob_shas = self._walk_code_paths(executor, exclude_dirs)
+                if blob_shas is None:
+                    return {}
+            
+            # Completion order varies; keep prompts (and their caches) stable
+            paths = sorted(blob_shas)
+            
+            # Unchanged blobs come from the local cache, the rest in bulk,
+            # falling back to per-file requests
+            files = self.github.get_files_cached(blob_shas)
+            fallback = {
+                executor.submit(self.github.get_file, path): path
+                for path in paths if path not in files
+            }
+            for future in as_completed(fallback):
+                content = future.result()
+                if content:
+                    files[fallback[future]] = content
         
-        def fetch_recursive(path=""):
-            items = self.github.list_files(path)
-            for item in items:
-                if not self.automation_running:
-                    break
-                    
-                if item['type'] == 'file':
-                    if any(item['name'].endswith(ext) for ext in ['.cpp', '.h', '.hpp', '.cc', '.c']):
-                        content = self.github.get_file(item['path'])
-                        if content:
-                            files[item['path']] = content
-                            self.log(f"Fetched: {item['path']}")
-                elif item['type'] == 'dir' and not item['name'].startswith('.'):
-                    fetch_recursive(item['path'])
-        
-        fetch_recursive()
-        return files
+        for path in paths:
+            if path in files:
+                self.log(f"Fetched: {path}")
+        return {path: files[path] for path in paths if path in files}
+    
+    def _walk_code_paths(self, executor: ThreadPoolExecutor,
+                         exclude_dirs: set) -> Optional[Dict[str, str]]:
+        """Map C++ file paths to blob SHAs by walking directories, or None if stopped"""
+        blob_shas = {}
+        
+        # Directory listings are independent round-trips - walk the tree
+        # breadth-first with every discovered directory listed concurrently
+        pending = {executor.submit(self.github.list_files, "")}
+        while pending:
+            if self._stop.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return None
+            
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for item in future.result():
+                    if item['type'] == 'file':
+                        if item['name'].endswith(_CPP_SUFFIXES):
+                            blob_shas[item['path']] = item['sha']
+                    elif (item['type'] == 'dir' and not item['name'].startswith('.')
+                          and item['name'] not in exclude_dirs):
+                        pending.add(executor.submit(self.github.list_files, item['path']))
+        return blob_shas
     
     def monitor_and_fix_with_claude(self, current_files: Dict[str, str]):
         """Monitor builds and let Claude fix any errors"""
         max_attempts = self.config.get('max_fix_attempts', 5)
         attempt = 0
         
-        while attempt < max_attempts and self.automation_running:
+        while attempt < max_attempts and not self._stop.is_set():
             attempt += 1
             self.log(f"Build attempt {attempt}/{max_attempts}")
             self.claude_log(f"Monitoring build attempt {attempt}...")
             
             # Wait for workflow to start
             self.update_status(f"Waiting for GitHub Actions (attempt {attempt})...", "blue")
-            time.sleep(15)
+            if self.webhook:
+                self.webhook.run_requested.wait(15)
+                self.webhook.run_requested.clear()
+            else:
+                self._sleep(15)
+            if self._stop.is_set():
+                break
             
             # Get latest workflow run
+            # Transient API failures are retried by the session; an empty
+            # list just means the run has not been registered yet, so keep
+            # waiting without spending an attempt
             runs = self.github.get_workflow_runs()
-            if not runs:
+            deadline = time.time() + 60
+            while not runs and time.time() < deadline:
                 self.log("No workflow runs found, waiting...", "WARNING")
-                time.sleep(10)
-                continue
+                if not self._sleep(5):
+                    break
+                runs = self.github.get_workflow_runs()
+            if not runs:
+                if not self._stop.is_set():
+                    self.log("No workflow run started for the pushed changes", "ERROR")
+                break
             
             latest_run = runs[0]
             run_id = latest_run['id']
@@ -940,7 +2046,18 @@ class BuildAutomationGUI:
             start_time = time.time()
             timeout = self.config.get('github_timeout', 300)
             
-            while self.automation_running:
+            # Poll quickly after each state change, backing off to 15s while
+            # the run stays in the same state
+            delay = 1
+            last_state = None
+            # Failed jobs' logs when the run was cut short by a failing job
+            early_job_logs = {}
+            cancel_requested = False
+            # Job listings are not conditional requests, so unlike the
+            # ETag'd status poll they are checked at a coarse cadence
+            next_jobs_check = 0.0
+            
+            while not self._stop.is_set():
                 if time.time() - start_time > timeout:
                     self.log("Build timeout reached", "WARNING")
                     break
@@ -949,14 +2066,46 @@ class BuildAutomationGUI:
                 if status.get('status') == 'completed':
                     break
                 
+                if status.get('status') != last_state:
+                    last_state = status.get('status')
+                    delay = 1
+                    self.log(f"Run {run_id} is {last_state} "
+                             f"(GitHub requests remaining: {self.github.rate_limit_remaining})")
+                else:
+                    delay = min(delay * 1.5, 15)
+                
+                # One OS failing is enough to start on a fix - stop the
+                # sibling jobs rather than wait out their build minutes
+                if (last_state == 'in_progress' and not cancel_requested
+                        and time.time() >= next_jobs_check):
+                    next_jobs_check = time.time() + 30
+                    jobs = self.github.list_run_jobs(run_id)
+                    if (any(job.get('conclusion') == 'failure' for job in jobs)
+                            and any(job.get('status') != 'completed' for job in jobs)):
+                        self.log("A job failed while others are still running, cancelling run", "WARNING")
+                        cancel_requested = self.github.cancel_run(run_id)
+                        early_job_logs = self.github.get_failed_job_logs(
+                            run_id, self.config.get('max_log_bytes', 32768))
+                        if early_job_logs:
+                            break
+                
                 self.update_status(f"Build running... ({int(time.time() - start_time)}s)", "blue")
-                time.sleep(10)
+                if self.webhook:
+                    # Woken by the completion event; the slow poll only
+                    # guards against a missed delivery
+                    remaining = timeout - (time.time() - start_time)
+                    self.webhook.wait_for_completion(run_id, timeout=max(min(60, remaining), 1))
+                else:
+                    self._sleep(delay)
             
-            if not self.automation_running:
+            if self._stop.is_set():
                 break
             
             # Check build result
-            status = self.github.get_run_status(run_id)
+            if early_job_logs:
+                status = {'status': 'completed', 'conclusion': 'failure'}
+            else:
+                status = self.github.get_run_status(run_id)
             
             if status.get('conclusion') == 'success':
                 self.log("✅ Build succeeded!", "SUCCESS")
@@ -980,20 +2129,27 @@ Build Automation Complete!
                 self.log(f"Build failed. Claude is analyzing errors...", "WARNING")
                 self.claude_log(f"Build failed. Analyzing error logs...")
                 
-                # Get error logs
-                error_log = self.github.get_run_logs(run_id)
+                # Get error logs per job first, so several failed OS builds
+                # can be analyzed separately; a cancelled run already has them.
+                # The run archive is only downloaded when no job log came back
+                max_log_bytes = self.config.get('max_log_bytes', 32768)
+                job_logs = early_job_logs
+                if not job_logs and len(self.config.get('target_os', [])) > 1:
+                    job_logs = self.github.get_failed_job_logs(run_id, max_log_bytes)
+                if job_logs:
+                    error_log = _tail_bytes(
+                        "\n".join(f"=== {name} ===\n{log}\n" for name, log in job_logs.items()),
+                        max_log_bytes
+                    )
+                else:
+                    error_log = self.github.get_run_logs(run_id, max_log_bytes)
                 if not error_log:
                     self.log("Could not retrieve error logs", "ERROR")
                     continue
                 
                 # Let Claude analyze and fix
                 self.claude_log("Diagnosing build errors and generating fixes...")
-                fixes = self.claude.fix_build_errors(
-                    error_log, 
-                    current_files, 
-                    attempt,
-                    self.original_source_files if attempt >= 3 else None
-                )
+                fixes = self.request_fixes(error_log, current_files, attempt, job_logs)
                 
                 if fixes.get('confidence', 0) < 0.3:
                     self.log("Claude has low confidence in fixes", "WARNING")
@@ -1010,41 +2166,28 @@ Build Automation Complete!
                 files_updated = False
                 code_changes_needed = fixes.get('requires_code_change', False)
                 
-                # First try build configuration fixes
-                # Update vcpkg.json if needed
-                if fixes.get('vcpkg_changes'):
-                    self.log("Updating vcpkg.json...")
-                    if self.github.create_or_update_file(
-                        'vcpkg.json',
-                        fixes['vcpkg_changes'],
-                        f"Claude fix {attempt}: Update dependencies"
-                    ):
-                        current_files['vcpkg.json'] = fixes['vcpkg_changes']
-                        files_updated = True
-                
-                # Update CMakeLists.txt if needed
-                if fixes.get('cmake_changes'):
-                    self.log("Updating CMakeLists.txt...")
-                    if self.github.create_or_update_file(
-                        'CMakeLists.txt',
-                        fixes['cmake_changes'],
-                        f"Claude fix {attempt}: Update CMake configuration"
-                    ):
-                        current_files['CMakeLists.txt'] = fixes['cmake_changes']
-                        files_updated = True
+                # Collect every change and push them as a single commit, so
+                # each attempt triggers exactly one workflow run
+                changes = {}
+                config_updates = {}
                 
-                # Update workflow if needed
-                if fixes.get('workflow_changes'):
-                    self.log("Updating workflow...")
-                    if self.github.create_or_update_file(
-                        '.github/workflows/build.yml',
-                        fixes['workflow_changes'],
-                        f"Claude fix {attempt}: Update workflow"
-                    ):
-                        current_files['workflow.yml'] = fixes['workflow_changes']
-                        files_updated = True
+                # First try build configuration fixes
+                for fix_key, path, local_name, label in [
+                    ('vcpkg_changes', 'vcpkg.json', 'vcpkg.json', 'vcpkg.json'),
+                    ('cmake_changes', 'CMakeLists.txt', 'CMakeLists.txt', 'CMakeLists.txt'),
+                    ('workflow_changes', '.github/workflows/build.yml', 'workflow.yml', 'workflow')
+                ]:
+                    if fixes.get(fix_key):
+                        # Re-pushing the current content would start no new run
+                        if fixes[fix_key] == current_files.get(local_name, current_files.get(path)):
+                            self.log(f"{label} is already up to date", "INFO")
+                            continue
+                        self.log(f"Updating {label}...")
+                        changes[path] = fixes[fix_key]
+                        config_updates[local_name] = fixes[fix_key]
                 
                 # Apply code changes only when necessary
+                modified_files = {}
                 if fixes.get('code_changes') and isinstance(fixes['code_changes'], dict):
                     # Check if we should apply code changes based on attempt number
                     should_apply_code_changes = (
@@ -1057,24 +2200,14 @@ Build Automation Complete!
                         self.claude_log("Code modifications required to fix compilation errors")
                         
                         # Apply the code changes
-                        modified_files = self.apply_code_changes(
-                            fixes['code_changes'],
-                            self.original_source_files
-                        )
-                        
-                        # Push modified source files
-                        for filename, content in modified_files.items():
-                            if self.github.create_or_update_file(
-                                filename,
-                                content,
-                                f"Claude fix {attempt}: Fix compilation error in {filename}"
-                            ):
-                                self.log(f"Updated source file: {filename}", "SUCCESS")
-                                # Update our local copy
-                                self.original_source_files[filename] = content
-                                files_updated = True
-                            else:
-                                self.log(f"Failed to update {filename}", "ERROR")
+                        modified_files = {
+                            filename: content for filename, content in self.apply_code_changes(
+                                fixes['code_changes'],
+                                self.original_source_files
+                            ).items()
+                            if content != self.original_source_files.get(filename)
+                        }
+                        changes.update(modified_files)
                     else:
                         # Just log the suggestions for now
                         self.log("Code changes suggested but not applied yet", "INFO")
@@ -1083,14 +2216,32 @@ Build Automation Complete!
                             if isinstance(change, dict):
                                 self.claude_log(f"Will modify {filename}: {change.get('explanation', '')}")
                 
+                if changes:
+                    if self.github.commit_files(
+                        changes,
+                        f"Claude fix {attempt}: Update {', '.join(changes)}"
+                    ):
+                        current_files.update(config_updates)
+                        for filename, content in modified_files.items():
+                            self.log(f"Updated source file: {filename}", "SUCCESS")
+                            # Update our local copy
+                            self.original_source_files[filename] = content
+                        files_updated = True
+                    else:
+                        self.log(f"Failed to commit fixes to {', '.join(changes)}", "ERROR")
+                
                 if not files_updated:
-                    self.log("No fixes could be applied", "WARNING")
-                    if attempt >= max_attempts - 1:
+                    # Nothing was pushed, so no new run will start; retrying
+                    # would only re-send the same errors to Claude
+                    if fixes.get('code_changes') and not modified_files and attempt < max_attempts:
+                        self.log("Only deferred code changes proposed, retrying", "INFO")
+                    else:
+                        self.log("No fixes could be applied", "WARNING")
                         break
                 
                 # Wait before next attempt
                 self.claude_log("Waiting for next build attempt...")
-                time.sleep(5)
+                self._sleep(5)
             
             else:
                 self.log(f"Unknown build status: {status.get('conclusion')}", "WARNING")
@@ -1115,14 +2266,35 @@ You may need to manually adjust the code or build configuration.
 """
             self.claude_log(summary)
 
+    def request_fixes(self, error_log: str, current_files: Dict[str, str],
+                      attempt: int, job_logs: Optional[Dict[str, str]] = None) -> Dict:
+        """Ask Claude for fixes, analyzing per-OS failures separately when
+        several jobs failed (in parallel, or as one batch when enabled)"""
+        source_files = self.original_source_files if attempt >= 3 else None
+        job_logs = job_logs or {}
+        
+        if len(job_logs) < 2:
+            return self.claude.fix_build_errors(error_log, current_files, attempt, source_files)
+        
+        if self.config.get('use_batch_api', False):
+            self.claude_log(f"Submitting {len(job_logs)} failed jobs as one batch...")
+            fixes_by_job = self.claude.fix_build_errors_batch(job_logs, current_files, attempt, source_files)
+        else:
+            self.claude_log(f"Analyzing {len(job_logs)} failed jobs in parallel...")
+            fixes_by_job = self.claude.fix_build_errors_parallel(job_logs, current_files, attempt, source_files)
+        
+        for job_name, job_fixes in fixes_by_job.items():
+            self.claude_log(f"{job_name}: {job_fixes.get('diagnosis', 'Unknown')}")
+        
+        # All jobs share the same build files, so apply the most confident fix
+        job_name, fixes = max(fixes_by_job.items(), key=lambda item: item[1].get('confidence', 0))
+        self.log(f"Using fixes proposed for {job_name}")
+        return fixes
+
 def main():
     """Main entry point"""
     # Create default files if they don't exist
-    if not Path('.env').exists():
-        with open('.env', 'w') as f:
-            f.write("# API Keys for C++ Build Automation\n")
-            f.write("ANTHROPIC_API_KEY=your_claude_api_key_here\n")
-            f.write("GITHUB_TOKEN=your_github_token_here\n")
+    if _write_default_env():
         print("Created .env file. Please add your API keys.")
     
     if not Path('config.json').exists():